@@ -7,6 +7,8 @@ HI 741 Final Project
 import os
 import sys
 import argparse
+import logging
+import logging.handlers
 from tkinter import messagebox
 
 # Import modules with proper naming (no "update1" in names)
@@ -23,8 +25,21 @@ def parse_args():
     parser.add_argument('-password', help='Password for direct login')
     return parser.parse_args()
 
+def setup_logging():
+    """Send package warnings to stderr, buffered so a burst costs one write"""
+    handler = logging.handlers.MemoryHandler(
+        capacity=1024,
+        flushLevel=logging.ERROR,  # Errors still show up straight away
+        target=logging.StreamHandler()
+    )
+    logger = logging.getLogger('src')
+    logger.setLevel(logging.WARNING)
+    logger.addHandler(handler)
+
 def main():
     """Main application entry point"""
+    setup_logging()
+
     # Ensure data directory exists
     os.makedirs("data", exist_ok=True)
 
@@ -48,8 +63,8 @@ def main():
 
         # Handle command-line login if provided (for testing)
         if args.username and args.password:
-            app.username_var.set(args.username)
-            app.password_var.set(args.password)
+            app.username.insert(0, args.username)
+            app.password.insert(0, args.password)
             app._login()
 
         # Start the application
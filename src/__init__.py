@@ -34,10 +34,15 @@ from .ui import ClinicalDataWarehouseUI
 # Handy helper functions used all around the package
 from .utils import (
     load_csv_data,    # read CSV files into lists of dicts
+    load_csv_rows,    # same, but errors are left to the caller
+    load_csv_columns,  # read CSV files into one list per column
+    load_csv_table,   # read CSV files into a PyArrow Table (needs pyarrow)
+    load_csv_tuples,  # read CSV files into lightweight tuples
     save_csv_data,    # write lists of dicts back as CSV safely
     log_activity,     # record user actions for auditing
+    append_log_row,   # add a timestamped row to any CSV log
     validate_date,    # check that dates look like YYYY-MM-DD
-    generate_unique_id  # create UUIDs for new records
+    generate_unique_id  # create unique IDs (UUIDs on request) for new records
 )
 
 # When you do `from datawarehouse import *`, here’s what you get
@@ -48,8 +53,13 @@ __all__ = [
     "StatsGenerator",
     "ClinicalDataWarehouseUI",
     "load_csv_data",
+    "load_csv_rows",
+    "load_csv_columns",
+    "load_csv_table",
+    "load_csv_tuples",
     "save_csv_data",
     "log_activity",
+    "append_log_row",
     "validate_date",
     "generate_unique_id",
 ]
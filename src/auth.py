@@ -5,28 +5,54 @@
 Authentication Module - Handles user logins and access control
 """
 
+import sys
 from datetime import datetime
-import csv
-import os
+from time import monotonic
+from .utils import load_csv_rows, append_log_row
 
 class AuthSystem:
     """Manages user authentication and tracks login attempts."""
 
-    def __init__(self, credentials_file='data/credentials.csv'):
+    def __init__(self, credentials_file='data/credentials.csv', ttl=300):
         self.credentials_file = credentials_file
+        self.ttl = ttl  # Seconds a successful login stays cached
         self.credentials = self._load_credentials()  # Load users from CSV
         self.failed_attempts = {}  # Keeps count of failed logins per user
+        self._auth_cache = {}  # (username, password) -> (expires_at, role)
+
+    def reload_credentials(self):
+        """Re-read the credentials file and forget any cached logins."""
+        self.credentials = self._load_credentials()
+        self._auth_cache.clear()
 
     def _load_credentials(self):
         # Reads the credentials CSV and builds a username lookup dictionary
         try:
-            with open(self.credentials_file, 'r', newline='') as f:
-                return {row['username']: row for row in csv.DictReader(f)}
+            rows = load_csv_rows(self.credentials_file)
+            for row in rows:
+                # Only a handful of roles, so let every user share one string
+                if row.get('role') is not None:
+                    row['role'] = sys.intern(row['role'])
+            return {row['username']: row for row in rows}
         except FileNotFoundError:
             print("Warning: credentials.csv not found. No users loaded.")
             return {}
 
     def authenticate(self, username, password):
+        # Same user and password verified recently? Skip the checks
+        cached = self._auth_cache.get((username, password))
+        if cached:
+            expires_at, role = cached
+            if monotonic() < expires_at:
+                self.failed_attempts.pop(username, None)
+                self._log(username, role, 'Successful login')
+                return {
+                    'username': username,
+                    'role': role,
+                    'login_time': datetime.now()
+                }
+            del self._auth_cache[(username, password)]  # Expired
+
         # Check if the username exists in our records
         user = self.credentials.get(username)
         if not user:
@@ -43,6 +69,7 @@ class AuthSystem:
         if username in self.failed_attempts:
             del self.failed_attempts[username]
 
+        self._auth_cache[(username, password)] = (monotonic() + self.ttl, user['role'])
         self._log(username, user['role'], 'Successful login')
         return {
             'username': username,
@@ -52,14 +79,7 @@ class AuthSystem:
 
     def _log(self, username, role, action):
         """Records login attempts and actions to usage_stats.csv"""
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        os.makedirs('data', exist_ok=True)  # Ensure the log directory exists
-
-        log_file = 'data/usage_stats.csv'
-        # Open log file in append mode
-        with open(log_file, 'a', newline='') as f:
-            writer = csv.writer(f)
-            # Write header if the file is empty
-            if f.tell() == 0:
-                writer.writerow(['Timestamp', 'Username', 'Role', 'Action'])
-            writer.writerow([timestamp, username, role, action])
+        append_log_row(
+            'data/usage_stats.csv', [username, role, action],
+            header=['Timestamp', 'Username', 'Role', 'Action']
+        )
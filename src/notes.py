@@ -5,9 +5,9 @@
 Notes Manager - Handles patient diaries (clinical notes) 
 """
 
-import csv
-from datetime import datetime
-import os
+from functools import lru_cache
+from itertools import zip_longest
+from .utils import load_csv_tuples, validate_date, append_log_row
 
 class NoteManager:
     """Keeps track of patient stories and helps find them later."""
@@ -15,19 +15,60 @@ class NoteManager:
     def __init__(self, notes_file='data/Notes.csv'):
         """Sets up our notebook. Loads existing stories from file."""
         self.notes_file = notes_file
-        self.notes = self._load_notes()  # Load past entries
+        # Notes are kept as tuples; _columns maps header -> position
+        self._columns, self.notes = self._load_notes()  # Load past entries
+        self._index = self._build_index()  # (patient, day) -> notes
+
+        # Notes are read-only, so repeat lookups can reuse earlier answers.
+        # Anything that changes self.notes must call self._lookup.cache_clear()
+        self._lookup = lru_cache(maxsize=512)(self._find_notes)
 
     def _load_notes(self):
         """Reads our notebook from file. Starts fresh if missing."""
         try:
-            with open(self.notes_file, 'r', newline='') as f:
-                return list(csv.DictReader(f))  # Convert CSV to list of dicts
+            return load_csv_tuples(self.notes_file)
         except FileNotFoundError:
             print(f"Psst! {self.notes_file} is hiding. Starting with empty notes.")
-            return []
+            return {}, []
         except Exception as e:
             print(f"Whoops! Trouble reading notes: {e}")
-            return []
+            return {}, []
+
+    def _build_index(self):
+        """Groups notes by patient ID and day so lookups skip the scan."""
+        pid_col = self._columns.get('PatientID')
+        date_col = self._columns.get('VisitDate')
+        if pid_col is None or date_col is None:
+            return {}  # Can't match anything without these columns
+
+        index = {}
+        for note in self.notes:
+            if len(note) <= max(pid_col, date_col):
+                continue  # Short row, nothing to match on
+            # Only the YYYY-MM-DD part counts, so timestamps still match
+            key = (note[pid_col], note[date_col][:10])
+            index.setdefault(key, []).append(note)
+        return index
+
+    def _find_notes(self, patient_id, date_str):
+        """Turns the indexed rows for one patient and day into note dicts."""
+        width = len(self._columns)
+        return tuple(
+            dict(zip(self._columns, note)) if len(note) == width
+            else self._ragged_note(note)
+            for note in self._index.get((patient_id, date_str), ())
+        )
+
+    def _ragged_note(self, note):
+        """
+        Note dict for a row with too few or too many cells, shaped the way
+        csv.DictReader would: missing cells are None, extras sit under None.
+        """
+        width = len(self._columns)
+        record = dict(zip_longest(self._columns, note[:width]))
+        if len(note) > width:
+            record[None] = list(note[width:])
+        return record
 
     def get_notes_by_date(self, patient_id, date_str, username=None):
         """
@@ -35,19 +76,11 @@ class NoteManager:
         Fixes the 'too many notes' bug by strict date matching!
         """
         # First, check the date makes sense
-        try:
-            datetime.strptime(date_str, '%Y-%m-%d')  # Y-M-D format check
-        except ValueError:
+        if not validate_date(date_str):  # Y-M-D format check
             return {'error': 'Date must look like 2023-12-31'}
 
-        matching_notes = []
-        for note in self.notes:
-            # Match both patient ID and full date (no partial matches!)
-            is_right_patient = note.get('PatientID') == patient_id
-            starts_with_date = note.get('VisitDate', '').startswith(date_str)
-            
-            if is_right_patient and starts_with_date:
-                matching_notes.append(note)
+        # Match both patient ID and full date (no partial matches!)
+        matching_notes = list(self._lookup(patient_id, date_str))
 
         # Tell the logbook someone looked at these notes
         if username:
@@ -58,15 +91,7 @@ class NoteManager:
 
     def _log_activity(self, username, action):
         """Jots down who did what in our secret diary (usage log)"""
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        os.makedirs('data', exist_ok=True)  # Create folder if needed
-
-        log_file = 'data/usage_stats.csv'
-        # Check if we're starting a new diary
-        new_diary = not os.path.exists(log_file) or os.path.getsize(log_file) == 0
-
-        with open(log_file, 'a', newline='') as f:
-            writer = csv.writer(f)
-            if new_diary:
-                writer.writerow(['When', 'Who', 'What'])  # Simple headers
-            writer.writerow([timestamp, username, action])
+        append_log_row(
+            'data/usage_stats.csv', [username, action],
+            header=['When', 'Who', 'What']  # Simple headers
+        )
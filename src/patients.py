@@ -11,10 +11,19 @@ Think of this as our hospital’s patient archive. It:
   • Counts how many visits happened on any given day  
 """
 
+import csv
 import os
-from datetime import datetime
+import sys
+from bisect import bisect_left, insort
+from datetime import date
+from functools import lru_cache
 from .utils import load_csv_data, save_csv_data, log_activity, generate_unique_id
 
+# Columns that repeat the same few values across many visits. Interning
+# them lets every row share one string object, much like a categorical
+# column, and makes lookups keyed on them cheaper.
+_SHARED_COLUMNS = ('PatientID', 'Gender', 'Department', 'VisitDate')
+
 class PatientRegistry:
     """
     Manages all patient visit records stored in Patient_data.csv.
@@ -30,23 +39,52 @@ class PatientRegistry:
         # Each element is a dict representing one visit
         self.patients = load_csv_data(self.data_file)
 
+        # Lookup tables so queries don't have to scan every visit:
+        #   _by_pid       -> PatientID -> list of that patient's visits
+        #   _by_date      -> VisitDate -> number of visits on that day
+        #   _sorted_dates -> every VisitDate in _by_date, oldest first
+        self._by_pid = {}
+        self._by_date = {}
+        self._sorted_dates = []
+
+        # Bumped on every add/remove so callers can tell when data changed
+        self.version = 0
+
+        for p in self.patients:
+            self._index_visit(p)
+
+        # Clinicians often look up the same patient again; remember the
+        # answers until the next add or remove
+        self._latest_visit = lru_cache(maxsize=1024)(self._find_latest_visit)
+
+    def _index_visit(self, visit):
+        """Add one visit to the lookup tables."""
+        for column in _SHARED_COLUMNS:
+            value = visit.get(column)
+            if type(value) is str:  # Scripts may pass e.g. an int PatientID
+                visit[column] = sys.intern(value)
+
+        self._by_pid.setdefault(visit.get('PatientID'), []).append(visit)
+        day = visit.get('VisitDate')
+        if day and day not in self._by_date:
+            insort(self._sorted_dates, day)  # First visit on this day
+        self._by_date[day] = self._by_date.get(day, 0) + 1
+
     def get_patient(self, patient_id):
         """
         Find the most recent visit for this patient ID.
         Returns a dict of visit details, or None if we have no record.
         """
-        # Gather all visits matching this ID
-        visits = [p for p in self.patients if p.get('PatientID') == patient_id]
+        return self._latest_visit(patient_id)
+
+    def _find_latest_visit(self, patient_id):
+        """Pick the newest of this patient's visits (uncached)."""
+        visits = self._by_pid.get(patient_id)
         if not visits:
             return None  # No visits found
 
-        # Parse each visit’s date so we can pick the latest one
-        for v in visits:
-            v['_parsed_date'] = datetime.strptime(v['VisitDate'], '%Y-%m-%d')
-        latest = max(visits, key=lambda v: v['_parsed_date'])
-        # Clean up our helper field before returning
-        del latest['_parsed_date']
-        return latest
+        # YYYY-MM-DD strings sort the same way as the dates they hold
+        return max(visits, key=lambda v: v.get('VisitDate', ''))
 
     def add_patient(self, patient_data, username):
         """
@@ -60,8 +98,10 @@ class PatientRegistry:
         Returns that new VisitID.
         """
         # Create the visit record
+        # Unique across restarts and across app instances sharing the CSV,
+        # so an audit entry always points at exactly one visit
         visit_id = generate_unique_id()
-        today = datetime.now().strftime('%Y-%m-%d')
+        today = date.today().isoformat()
         record = {
             'PatientID':      patient_data['PatientID'],
             'FirstName':      patient_data['FirstName'],
@@ -74,28 +114,90 @@ class PatientRegistry:
             'VisitID':        visit_id
         }
 
-        # Add to our in-memory list and save it back to CSV
+        # Index first: if that fails, the visit mustn't linger in the list
+        # (a later remove would write it to disk). Then append it to the CSV.
+        self._index_visit(record)
         self.patients.append(record)
-        save_csv_data(self.data_file, self.patients, fieldnames=list(record.keys()))
+        self._latest_visit.cache_clear()
+        self.version += 1
+        self._append_row(record)
 
         # Log who added this record for auditing
         log_activity(username, 'patient_registry',
                      f"Added visit {visit_id} for Patient {record['PatientID']}")
         return visit_id
 
+    def _append_row(self, record):
+        """
+        Write a single visit to the end of the CSV.
+        Adds never touch existing rows, so there's no need to rewrite the file.
+        The row follows the column order of the header already in the file;
+        if that header holds different columns, the whole file is rewritten.
+        """
+        header, ends_with_newline = self._file_layout()
+        if header is not None and sorted(header) != sorted(record):
+            # Appending would put values under the wrong columns. Rewrite
+            # instead, keeping any extra columns the file already had
+            fieldnames = list(record) + [h for h in header if h not in record]
+            save_csv_data(self.data_file, self.patients, fieldnames=fieldnames)
+            return
+
+        os.makedirs(os.path.dirname(self.data_file) or '.', exist_ok=True)
+        with open(self.data_file, 'a', newline='') as f:
+            if header is None:
+                writer = csv.DictWriter(f, fieldnames=list(record.keys()))
+                writer.writeheader()  # Brand-new file
+            else:
+                writer = csv.DictWriter(f, fieldnames=header)
+                if not ends_with_newline:
+                    f.write('\r\n')  # Don't glue onto the last row
+            writer.writerow(record)
+
+    def _file_layout(self):
+        """
+        Peek at the CSV: returns (header, ends_with_newline).
+        header is None when the file is missing or empty.
+        """
+        try:
+            with open(self.data_file, 'rb') as f:
+                if f.seek(0, os.SEEK_END) == 0:
+                    return None, True
+                f.seek(-1, os.SEEK_END)
+                ends_with_newline = f.read(1) in (b'\n', b'\r')
+                f.seek(0)
+                first_line = f.readline()
+        except FileNotFoundError:
+            return None, True
+
+        # utf-8-sig drops a byte-order mark so it can't stick to the first name
+        text = first_line.decode('utf-8-sig', errors='replace')
+        return next(csv.reader([text]), []), ends_with_newline
+
     def remove_patient(self, patient_id, username):
         """
         Wipe out every visit for this patient ID.
         Returns True if we deleted anything, False otherwise.
         """
-        before = len(self.patients)
-        # Keep only records that are NOT matching the ID
-        self.patients = [
-            p for p in self.patients
-            if p.get('PatientID') != patient_id
-        ]
-        deleted = len(self.patients) < before
+        removed = self._by_pid.pop(patient_id, None)
+        deleted = bool(removed)
         if deleted:
+            self._latest_visit.cache_clear()
+            self.version += 1
+
+            # Take their visits out of the daily tallies
+            for v in removed:
+                day = v.get('VisitDate')
+                self._by_date[day] -= 1
+                if not self._by_date[day]:
+                    del self._by_date[day]
+                    if day:
+                        del self._sorted_dates[bisect_left(self._sorted_dates, day)]
+
+            # Keep only records that are NOT matching the ID
+            self.patients = [
+                p for p in self.patients
+                if p.get('PatientID') != patient_id
+            ]
             # Save the shortened list back to CSV
             keys = self.patients[0].keys() if self.patients else None
             save_csv_data(self.data_file, self.patients, fieldnames=keys)
@@ -107,12 +209,18 @@ class PatientRegistry:
     def count_visits_by_date(self, date_str):
         """
         Count how many visits happened on a given date (YYYY-MM-DD).
-        Simple tally from our in-memory list.
+        Read straight from the daily tally kept alongside the visits.
+        """
+        return self._by_date.get(date_str, 0)
+
+    def count_visits_since(self, cutoff):
+        """
+        Daily visit totals for every date on or after `cutoff` (YYYY-MM-DD).
+        Returns (date, count) pairs, oldest first. A binary search finds
+        where the window starts, so only the days inside it are touched.
         """
-        return sum(
-            1 for p in self.patients
-            if p.get('VisitDate') == date_str
-        )
+        start = bisect_left(self._sorted_dates, cutoff)
+        return [(day, self._by_date[day]) for day in self._sorted_dates[start:]]
 
     def get_all_visits(self):
         """
@@ -5,15 +5,17 @@
 StatsGenerator: compute and plot visit‐trend statistics for the Clinical Data Warehouse.
 """
 
-import os
-import pandas as pd
-import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
+import threading
+from datetime import date, timedelta
 from .utils import save_csv_data
 
 class StatsGenerator:
     """
     Generate and plot visit trends from patient visit data.
+
+    The work is split in three steps so headless scripts can skip the chart
+    (and the cost of importing Matplotlib):
+      compute_visit_counts() -> export_csv() -> plot()
     """
 
     def __init__(self, patient_registry):
@@ -22,46 +24,91 @@ class StatsGenerator:
         """
         self.patient_registry = patient_registry
 
-    def plot_visit_trends(self, days=30):
+        # The chart is built once and then updated in place
+        self._fig = None
+        self._ax = None
+        self._bars = None
+        self._bar_dates = None
+        self._plot_lock = threading.RLock()  # Matplotlib isn't thread-safe
+
+    def compute_visit_counts(self, days=30):
         """
-        Build a bar chart of daily visit counts for the past `days` days,
-        save those counts to output/visit_stats.csv, and return the Matplotlib Figure.
+        Daily visit counts for the past `days` days (today included),
+        as a list of (YYYY-MM-DD, count) pairs, oldest first.
         """
-        # Load all visits from the registry (assumed to return list of dicts)
-        visits = self.patient_registry.get_all_visits()
-        df = pd.DataFrame(visits)
-        df['VisitDate'] = pd.to_datetime(df['VisitDate'])
-
-        # Filter for the last `days` days
-        cutoff = datetime.now() - timedelta(days=days)
-        recent = df[df['VisitDate'] >= cutoff]
+        # YYYY-MM-DD strings compare the same way as the dates they hold,
+        # so no parsing is needed. The window is today plus the days - 1
+        # before it; going back a full `days` would show one day too many.
+        cutoff = (date.today() - timedelta(days=days - 1)).isoformat()
 
-        # Count visits per day
-        visit_counts = recent.groupby(recent['VisitDate'].dt.date).size()
+        # Per-day totals straight from the registry's daily tally
+        return self.patient_registry.count_visits_since(cutoff)
 
-        # --- WRITE OUT CSV OF VISIT STATISTICS ---
-        os.makedirs('output', exist_ok=True)
+    def export_csv(self, visit_counts, path='output/visit_stats.csv'):
+        """
+        Save (date, count) pairs from compute_visit_counts() to a CSV file.
+        """
         stats_rows = [
-            {'Date': date.strftime('%Y-%m-%d'), 'VisitCount': int(count)}
-            for date, count in visit_counts.items()
+            {'Date': day, 'VisitCount': count}
+            for day, count in visit_counts
         ]
-        save_csv_data(
-            'output/visit_stats.csv',
-            stats_rows,
-            fieldnames=['Date', 'VisitCount']
-        )
-        # ------------------------------------------
+        save_csv_data(path, stats_rows, fieldnames=['Date', 'VisitCount'])
+
+    def ensure_figure(self):
+        """
+        Create the chart's Figure and Axes the first time they're needed
+        and return the Figure. Later calls hand back the same one.
+        """
+        with self._plot_lock:
+            if self._fig is None:
+                import matplotlib.pyplot as plt  # Deferred: only charts need it
+
+                # 80 dpi fits the 800x600 stats window and rasterises faster
+                self._fig, self._ax = plt.subplots(figsize=(10, 6), dpi=80)
+            return self._fig
 
-        # Plotting
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.bar(
-            [d.strftime('%Y-%m-%d') for d in visit_counts.index],
-            visit_counts.values,
-            color='skyblue'
-        )
-        ax.set_title(f"Visits in Last {days} Days")
-        ax.set_xlabel("Date")
-        ax.set_ylabel("Number of Visits")
-        plt.xticks(rotation=45, ha='right')
-        plt.tight_layout()
-        return fig
+    def update_data(self, visit_counts, days=30):
+        """
+        Show new (date, count) pairs on the existing chart.
+        When the days match the bars already drawn, only their heights change.
+        """
+        dates = [day for day, _ in visit_counts]
+        totals = [count for _, count in visit_counts]
+        with self._plot_lock:
+            self.ensure_figure()
+            ax = self._ax
+
+            if self._bars is not None and dates == self._bar_dates:
+                # Same days as last time: only the bar heights change
+                for bar, height in zip(self._bars, totals):
+                    bar.set_height(height)
+                ax.relim()
+                ax.autoscale_view()
+                ax.set_title(f"Visits in Last {days} Days")
+            else:
+                ax.clear()
+                ax.set_title(f"Visits in Last {days} Days")
+                self._bars = ax.bar(dates, totals, color='skyblue')
+                self._bar_dates = dates
+                ax.set_xlabel("Date")
+                ax.set_ylabel("Number of Visits")
+                for label in ax.get_xticklabels():
+                    label.set_rotation(45)
+                    label.set_horizontalalignment('right')
+                self._fig.tight_layout()
+
+    def plot(self, visit_counts, days=30):
+        """
+        Draw (date, count) pairs as a bar chart and return the Matplotlib Figure.
+        """
+        self.update_data(visit_counts, days)
+        return self._fig
+
+    def plot_visit_trends(self, days=30):
+        """
+        Build a bar chart of daily visit counts for the past `days` days,
+        save those counts to output/visit_stats.csv, and return the Matplotlib Figure.
+        """
+        visit_counts = self.compute_visit_counts(days)
+        self.export_csv(visit_counts)
+        return self.plot(visit_counts, days)
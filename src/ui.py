@@ -10,9 +10,10 @@ counting visits, and generating statistics.
 """
 
 import tkinter as tk
+from functools import partial
 from tkinter import ttk, messagebox
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from datetime import datetime
+from datetime import date
+from .utils import validate_date
 
 class ClinicalDataWarehouseUI(tk.Tk):
     """Main application window managing login and user workflows."""
@@ -30,6 +31,21 @@ class ClinicalDataWarehouseUI(tk.Tk):
         ]
     }
 
+    # What each role may do, for a quick membership check on every click
+    _ROLE_ALLOWED = {
+        role: frozenset(menu) for role, menu in ROLE_MENUS.items()
+    }
+
+    # Matplotlib's Tk canvas, imported the first time stats are shown so
+    # users who never open them don't pay for loading Matplotlib
+    _FigureCanvas = None
+
+    # (action, button label) pairs per role, worked out once
+    _ROLE_BUTTONS = {
+        role: [(action, action.replace('_', ' ').title()) for action in menu]
+        for role, menu in ROLE_MENUS.items()
+    }
+
     def __init__(self, auth_system, patient_db, note_manager, stats_engine):
         """Store references and show the login screen first."""
         super().__init__()
@@ -39,19 +55,53 @@ class ClinicalDataWarehouseUI(tk.Tk):
         self.stats = stats_engine
         self.current_user = None
 
+        # Last stats chart, reused until the visit data (or the day) changes
+        self._stats_fig = None
+        self._stats_version = None
+        # The window showing it; a Figure can only live on one canvas
+        self._stats_win = None
+        self._stats_canvas = None
+
+        # Menu action -> handler, built once rather than on every click
+        self._actions = {
+            'exit': self.quit,
+            'find_patient': self._dialog_find_patient,
+            'add_patient': self._dialog_add_patient,
+            'remove_patient': self._dialog_remove_patient,
+            'count_visits': self._dialog_count_visits,
+            'view_notes': self._dialog_view_notes,
+            'generate_stats': self._show_stats
+        }
+
+        # One ready-made button callback per menu action
+        self._menu_commands = {
+            action: partial(self._handle_action, action)
+            for menu in self.ROLE_MENUS.values() for action in menu
+        }
+
         self.title("Clinical Data Warehouse")
         self.geometry("800x600")
+
+        # Screens are built once and stacked in the same grid cell;
+        # switching screens just raises one above the others
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+        self._pages = {
+            'login': self._build_login_page(),
+            'menu': ttk.Frame(self, padding=20)
+        }
+        for page in self._pages.values():
+            page.grid(row=0, column=0, sticky='nsew')
         self._show_login()
 
-    def _clear(self):
-        """Remove all current widgets."""
-        for widget in self.winfo_children():
-            widget.destroy()
+    def _show_page(self, name):
+        """Bring one of the prebuilt screens to the front."""
+        self._pages[name].tkraise()
 
-    def _show_login(self):
-        """Ask for user credentials to start a session."""
-        self._clear()
-        frame = ttk.Frame(self, padding=20)
+    def _build_login_page(self):
+        """Create the login screen's widgets."""
+        page = ttk.Frame(self)
+        frame = ttk.Frame(page, padding=20)
         frame.pack(expand=True)
 
         ttk.Label(frame, text="Please log in", font=("Arial", 18)).pack(pady=10)
@@ -62,6 +112,12 @@ class ClinicalDataWarehouseUI(tk.Tk):
         self.password = ttk.Entry(frame, width=30, show="*")
         self.password.pack(pady=5)
         ttk.Button(frame, text="Login", command=self._login).pack(pady=15)
+        return page
+
+    def _show_login(self):
+        """Ask for user credentials to start a session."""
+        self.password.delete(0, 'end')
+        self._show_page('login')
 
     def _login(self):
         """Validate credentials and proceed or show an error."""
@@ -71,39 +127,38 @@ class ClinicalDataWarehouseUI(tk.Tk):
         )
         if user:
             self.current_user = user
+            # The login page stays alive behind the menu; don't keep the
+            # password sitting in it for the whole session
+            self.password.delete(0, 'end')
             self._show_main_menu()
         else:
             messagebox.showerror("Login Failed", "Incorrect username or password")
 
     def _show_main_menu(self):
         """Display actions based on the logged-in user's role."""
-        self._clear()
-        frame = ttk.Frame(self, padding=20)
-        frame.pack(expand=True, fill='both')
+        frame = self._pages['menu']
+        for widget in frame.winfo_children():
+            widget.destroy()  # Buttons depend on who's logged in
 
         role = self.current_user['role']
         welcome = f"Welcome {self.current_user['username']} ({role})"
         ttk.Label(frame, text=welcome, font=("Arial", 14)).pack(pady=10)
 
-        for action in self.ROLE_MENUS.get(role, []):
-            label = action.replace('_', ' ').title()
+        for action, label in self._ROLE_BUTTONS.get(role, []):
             ttk.Button(
                 frame, text=label,
-                command=lambda a=action: self._handle_action(a),
+                command=self._menu_commands[action],
                 width=30
             ).pack(pady=5)
+        self._show_page('menu')
 
     def _handle_action(self, action):
         """Route each menu choice to its handler."""
-        {
-            'exit': self.quit,
-            'find_patient': self._dialog_find_patient,
-            'add_patient': self._dialog_add_patient,
-            'remove_patient': self._dialog_remove_patient,
-            'count_visits': self._dialog_count_visits,
-            'view_notes': self._dialog_view_notes,
-            'generate_stats': self._show_stats
-        }.get(action, lambda: None)()
+        # Only run actions the current user's role is allowed to use
+        role = self.current_user['role'] if self.current_user else None
+        if action not in self._ROLE_ALLOWED.get(role, frozenset()):
+            return
+        self._actions.get(action, lambda: None)()
 
     def _dialog_find_patient(self):
         """Prompt for a patient ID and display their record."""
@@ -139,8 +194,8 @@ class ClinicalDataWarehouseUI(tk.Tk):
 
         text = tk.Text(win, wrap='word')
         text.pack(fill='both', expand=True)
-        for key, val in patient.items():
-            text.insert('end', f"{key}: {val}\n")
+        # One insert for the whole record; each insert is a trip into Tcl
+        text.insert('end', ''.join(f"{key}: {val}\n" for key, val in patient.items()))
         text.config(state='disabled')
 
     def _dialog_add_patient(self):
@@ -151,25 +206,22 @@ class ClinicalDataWarehouseUI(tk.Tk):
         frm = ttk.Frame(dlg, padding=15)
         frm.pack(fill='both', expand=True)
 
+        # Plain entries, read once on submit; keyed by the record field
         fields = {}
-        labels = ["Patient ID", "First Name", "Last Name", "Gender",
-                  "DOB (YYYY-MM-DD)", "Chief Complaint", "Department"]
-        for label in labels:
+        labels = [
+            ('PatientID', "Patient ID"), ('FirstName', "First Name"),
+            ('LastName', "Last Name"), ('Gender', "Gender"),
+            ('DOB', "DOB (YYYY-MM-DD)"), ('ChiefComplaint', "Chief Complaint"),
+            ('Department', "Department")
+        ]
+        for key, label in labels:
             ttk.Label(frm, text=label + ":").pack(anchor='w')
             entry = ttk.Entry(frm, width=30)
             entry.pack(pady=3)
-            fields[label] = entry
+            fields[key] = entry
 
         def add():
-            data = {
-                'PatientID': fields["Patient ID"].get().strip(),
-                'FirstName': fields["First Name"].get().strip(),
-                'LastName': fields["Last Name"].get().strip(),
-                'Gender': fields["Gender"].get().strip(),
-                'DOB': fields["DOB (YYYY-MM-DD)"].get().strip(),
-                'ChiefComplaint': fields["Chief Complaint"].get().strip(),
-                'Department': fields["Department"].get().strip()
-            }
+            data = {key: entry.get().strip() for key, entry in fields.items()}
             if not data['PatientID']:
                 messagebox.showerror("Missing ID", "Patient ID is required")
                 return
@@ -222,9 +274,7 @@ class ClinicalDataWarehouseUI(tk.Tk):
 
         def count():
             date_str = date_entry.get().strip()
-            try:
-                datetime.strptime(date_str, '%Y-%m-%d')
-            except ValueError:
+            if not validate_date(date_str):
                 messagebox.showerror("Bad Format", "Use YYYY-MM-DD")
                 return
             total = self.patients.count_visits_by_date(date_str)
@@ -267,30 +317,37 @@ class ClinicalDataWarehouseUI(tk.Tk):
         win.geometry("600x400")
         txt = tk.Text(win, wrap='word')
         txt.pack(fill='both', expand=True)
-        for note in notes:
-            txt.insert('end', f"{note['VisitDate']}: {note['NoteText']}\n\n")
+        txt.insert('end', ''.join(
+            f"{note['VisitDate']}: {note['NoteText']}\n\n" for note in notes
+        ))
         txt.config(state='disabled')
 
     def _show_stats(self):
         """Generate and display a plot of visit trends."""
-        fig = self.stats.plot_visit_trends()
+        if ClinicalDataWarehouseUI._FigureCanvas is None:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            ClinicalDataWarehouseUI._FigureCanvas = FigureCanvasTkAgg
+
+        # The 30-day window moves at midnight, so the date is part of the key
+        version = (self.patients.version, date.today())
+        stale = self._stats_fig is None or self._stats_version != version
+        if stale:
+            self._stats_fig = self.stats.plot_visit_trends()
+            self._stats_version = version
+
+        # Already open? Bring that window forward instead of putting the
+        # same Figure on a second canvas, where the two would fight over it
+        if self._stats_win is not None and self._stats_win.winfo_exists():
+            if stale:
+                self._stats_canvas.draw_idle()
+            self._stats_win.deiconify()
+            self._stats_win.lift()
+            return
+
         win = tk.Toplevel(self)
         win.title("Visit Trends")
         win.geometry("800x600")
-        canvas = FigureCanvasTkAgg(fig, master=win)
-        canvas.draw()
+        canvas = self._FigureCanvas(self._stats_fig, master=win)
+        canvas.draw_idle()  # Let Tk render when it's idle instead of blocking
         canvas.get_tk_widget().pack(fill='both', expand=True)
-
-if __name__ == "__main__":
-    from auth import AuthSystem
-    from patients import PatientRegistry
-    from notes import NoteManager
-    from stats import StatsGenerator
-
-    app = ClinicalDataWarehouseUI(
-        AuthSystem(),
-        PatientRegistry(),
-        NoteManager(),
-        StatsGenerator()
-    )
-    app.mainloop()
+        self._stats_win, self._stats_canvas = win, canvas
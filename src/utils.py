@@ -7,10 +7,157 @@ Utility Functions for Clinical Data Warehouse
 Handles safe CSV I/O, audit logging, date validation, and unique ID generation.
 """
 
+import atexit
+import contextlib
 import csv
+import io
+import itertools
+import logging
 import os
-from datetime import datetime
-from uuid import uuid4
+import sys
+import threading
+import time
+from collections import deque
+from datetime import date
+from operator import itemgetter
+from uuid import UUID
+
+log = logging.getLogger(__name__)
+
+# PyArrow's multithreaded C++ CSV parser is used when it's installed;
+# otherwise everything falls back to the standard csv module.
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = pacsv = None
+
+# Buffer size for the csv-module read paths; the 8 KiB default turns a
+# multi-megabyte file into hundreds of read() calls
+_READ_BUFFER = 1 << 20
+
+def _read_header(filename):
+    """
+    First row of a CSV file, or [] if it is empty. A UTF-8 byte-order mark
+    is dropped so it can't stick to the first column name.
+    """
+    with open(filename, 'r', newline='', encoding='utf-8-sig') as f:
+        return next(csv.reader(f), [])
+
+def _strip_bom(header):
+    """Drop a byte-order mark left on the first name by a plain text read."""
+    if header and header[0].startswith('\ufeff'):
+        header[0] = header[0][1:]
+    return header
+
+def _read_arrow_table(filename, header):
+    """
+    Parse a CSV file with PyArrow, keeping every column as text so values
+    like IDs aren't turned into numbers. Errors are left to the caller.
+    """
+    # Memory-map the file so the parser threads read pages straight from
+    # the page cache instead of through read() calls
+    with pa.memory_map(filename) as source:
+        return pacsv.read_csv(
+            source,
+            # 1 MiB blocks give the parser threads bigger chunks to work on.
+            # The column names are ours, so the text-only types below are
+            # guaranteed to line up with them.
+            read_options=pacsv.ReadOptions(
+                use_threads=True, block_size=1 << 20,
+                column_names=header, skip_rows=1
+            ),
+            parse_options=pacsv.ParseOptions(newlines_in_values=True),
+            convert_options=pacsv.ConvertOptions(
+                column_types={name: pa.string() for name in header},
+                strings_can_be_null=False,
+                quoted_strings_can_be_null=False
+            )
+        )
+
+def _dicts_from(f):
+    """
+    Turn an open CSV file into a list of dicts, skipping blank lines.
+    Cheaper than csv.DictReader, and every row shares the same interned
+    header strings as keys. Rows come out shaped just as DictReader makes
+    them, ragged ones included.
+    """
+    reader = csv.reader(f)
+    header = [sys.intern(name) for name in _strip_bom(next(reader, []))]
+    width = len(header)
+    return [
+        dict(zip(header, row)) if len(row) == width else _ragged_row(header, row)
+        for row in reader if row
+    ]
+
+def _ragged_row(header, row):
+    """
+    Dict for a row with too few or too many cells, the DictReader way:
+    missing cells are None, and extra cells go in a list under the key None.
+    """
+    width = len(header)
+    record = dict(itertools.zip_longest(header, row[:width]))
+    if len(row) > width:
+        record[None] = row[width:]
+    return record
+
+def load_csv_rows(filename):
+    """
+    Parse a CSV file into a list of dicts. Errors are left to the caller.
+    """
+    if pacsv is None:
+        with open(filename, 'r', newline='', buffering=_READ_BUFFER) as f:
+            return _dicts_from(f)
+
+    header = _read_header(filename)
+    if not header:
+        return []  # Empty file
+    try:
+        return _read_arrow_table(filename, header).to_pylist()
+    except pa.ArrowInvalid:
+        # Ragged rows etc.; the csv module is more forgiving
+        with open(filename, 'r', newline='', buffering=_READ_BUFFER) as f:
+            return _dicts_from(f)
+
+def load_csv_table(filename):
+    """
+    Read a CSV file into a PyArrow Table (every column as text), for code
+    that can work a whole column at a time instead of row by row.
+    Requires PyArrow. Errors are left to the caller.
+    """
+    if pacsv is None:
+        raise ImportError("load_csv_table requires pyarrow")
+    return _read_arrow_table(filename, _read_header(filename))
+
+def load_csv_tuples(filename):
+    """
+    Parse a CSV file into plain tuples, which are lighter than dicts.
+    Returns (columns, rows) where columns maps each header to its position.
+    Errors are left to the caller.
+    """
+    with open(filename, 'r', newline='', buffering=_READ_BUFFER) as f:
+        reader = csv.reader(f)
+        header = _strip_bom(next(reader, []))
+        rows = [tuple(row) for row in reader if row]
+    return {name: i for i, name in enumerate(header)}, rows
+
+def load_csv_columns(filename):
+    """
+    Parse a CSV file column by column: returns {header: [values, ...]}.
+    Handy when a whole column is filtered or counted at once. Every list
+    has one entry per row; cells missing from short rows come back as ''.
+    Errors are left to the caller.
+    """
+    with open(filename, 'r', newline='', buffering=_READ_BUFFER) as f:
+        reader = csv.reader(f)
+        header = _strip_bom(next(reader, []))
+        rows = [row for row in reader if row]
+
+    # zip_longest transposes rows into columns in C, padding short rows
+    columns = dict(zip(header, map(list, itertools.zip_longest(*rows, fillvalue=''))))
+    for name in header:
+        columns.setdefault(name, [''] * len(rows))  # Column no row reaches
+    return columns
 
 def load_csv_data(filename):
     """
@@ -18,16 +165,15 @@ def load_csv_data(filename):
     Returns an empty list if the file cannot be read.
     """
     try:
-        with open(filename, 'r', newline='') as f:
-            return list(csv.DictReader(f))
+        return load_csv_rows(filename)
     except FileNotFoundError:
-        print(f"Warning: File {filename} not found. Returning empty list.")
+        log.warning("File %s not found. Returning empty list.", filename)
         return []
     except PermissionError:
-        print(f"Error: Permission denied accessing {filename}.")
+        log.error("Permission denied accessing %s.", filename)
         return []
     except Exception as e:
-        print(f"Error loading {filename}: {e}")
+        log.error("Error loading %s: %s", filename, e)
         return []
 
 def save_csv_data(filename, data, fieldnames=None):
@@ -37,50 +183,255 @@ def save_csv_data(filename, data, fieldnames=None):
     if not data:
         return
 
-    if not fieldnames:
-        fieldnames = list(data[0].keys())
+    fieldnames = list(fieldnames or data[0].keys())
+
+    # Build the whole file in memory so it goes out in a single write
+    # Plain sequences are cheaper for csv than DictWriter's per-row mapping.
+    # itemgetter pulls a whole row out in one C call when every row has
+    # every column; otherwise missing cells are filled in with ''.
+    rows = None
+    if len(fieldnames) > 1:  # With one name itemgetter returns a bare value
+        try:
+            rows = list(map(itemgetter(*fieldnames), data))
+        except KeyError:
+            pass  # Some rows lack a column
+    if rows is None:
+        rows = [[row.get(k, '') for k in fieldnames] for row in data]
+
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(fieldnames)
+    writer.writerows(rows)
+    blob = buf.getvalue()
 
     os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
     temp_file = filename + '.tmp'
     try:
         with open(temp_file, 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(data)
+            f.write(blob)
+            # Make sure the data is on disk before the rename makes it live,
+            # or a crash could leave an empty file under the real name
+            f.flush()
+            os.fsync(f.fileno())
         os.replace(temp_file, filename)
     except Exception:
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
+        with contextlib.suppress(FileNotFoundError):  # May never have been created
+            os.unlink(temp_file)
         raise
 
+class _LogWriter:
+    """
+    Keeps one append-mode CSV log open per path instead of reopening the
+    file for every row. Rows are queued in memory and a background thread
+    writes them as a batch once BATCH_SIZE of them pile up, every
+    FLUSH_INTERVAL seconds, or when the program exits. Each batch goes out
+    in a single os.write() on an O_APPEND descriptor, so it lands at the
+    end of the file in one piece. If the file can't be written, rows stay
+    queued and are retried on the next flush.
+    """
+
+    BATCH_SIZE = 64
+    FLUSH_INTERVAL = 1.0  # seconds
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls, path):
+        """Return the shared writer for `path`, creating it on first use."""
+        with cls._instances_lock:
+            writer = cls._instances.get(path)
+            if writer is None:
+                writer = cls._instances[path] = cls(path)
+            return writer
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+        self._header = None
+        self._pending = deque()
+        self._unsent = b''  # Encoded rows the file hasn't taken yet
+        self._lock = threading.Lock()
+        # Set by write() when a full batch is waiting; the flusher thread
+        # otherwise wakes up every FLUSH_INTERVAL on its own
+        self._wake = threading.Event()
+        self._flusher = None
+        atexit.register(self.close)
+
+    def write(self, row, header=None):
+        """
+        Queue one row. `header` is written first if the log file is empty.
+        """
+        with self._lock:
+            if self._header is None:
+                self._header = header
+            self._pending.append(row)
+
+            if self._flusher is None or not self._flusher.is_alive():
+                # One long-lived thread per log instead of a timer per batch
+                self._flusher = threading.Thread(
+                    target=self._run_flusher,
+                    name=f'log-flusher:{self.path}',
+                    daemon=True
+                )
+                self._flusher.start()
+            if len(self._pending) >= self.BATCH_SIZE:
+                self._wake.set()
+
+    def _run_flusher(self):
+        """Background loop: write out queued rows as they build up."""
+        failing = False
+        while True:
+            self._wake.wait(self.FLUSH_INTERVAL)
+            self._wake.clear()
+            try:
+                self.flush()
+            except OSError as e:
+                # Keep the rows and keep trying; report once per outage
+                if not failing:
+                    log.error("Can't write log %s, will retry: %s", self.path, e)
+                failing = True
+            else:
+                if failing:
+                    log.warning("Writing log %s again.", self.path)
+                failing = False
+
+    def flush(self):
+        """Write any queued rows to the file."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        # Caller must hold self._lock. Rows only count as written once
+        # os.write() has taken their bytes; on OSError whatever is left
+        # stays in _pending/_unsent for the next try.
+        if not self._pending and not self._unsent:
+            return
+
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, 'O_BINARY', 0)
+            self._fd = os.open(self.path, flags, 0o644)
+            if self._header and os.fstat(self._fd).st_size == 0:
+                self._unsent = self._encode([self._header]) + self._unsent  # Brand-new log
+
+        if self._pending:
+            self._unsent += self._encode(self._pending)
+            self._pending.clear()
+
+        try:
+            while self._unsent:
+                written = os.write(self._fd, self._unsent)
+                self._unsent = self._unsent[written:]
+        except OSError:
+            # Start from a fresh descriptor next time
+            with contextlib.suppress(OSError):
+                os.close(self._fd)
+            self._fd = None
+            raise
+
+    @staticmethod
+    def _encode(rows):
+        """Let csv handle quoting, then turn the batch into one bytes blob."""
+        buf = io.StringIO()
+        csv.writer(buf).writerows(rows)
+        return buf.getvalue().encode('utf-8', errors='replace')
+
+    def close(self):
+        """Flush and close the log file."""
+        with self._lock:
+            try:
+                self._flush_locked()
+            except OSError as e:
+                log.error("Lost unwritten rows for log %s: %s", self.path, e)
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+# (second, formatted string) of the last log timestamp; a burst of events
+# within the same second reuses the string instead of formatting again
+_last_timestamp = (None, '')
+
+def _timestamp():
+    """
+    Current local time as 'YYYY-MM-DD HH:MM:SS'.
+    """
+    global _last_timestamp
+    now = int(time.time())
+    second, text = _last_timestamp
+    if now != second:
+        text = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))
+        _last_timestamp = (now, text)
+    return text
+
+def append_log_row(path, row, header=None):
+    """
+    Queue one CSV log row for `path`, with the current time put in front.
+    `header` (including the time column) is written first if the log is
+    empty. Rows are written in batches by a background thread.
+    """
+    _LogWriter.instance(path).write([_timestamp(), *row], header=header)
+
 def log_activity(username, role, action):
     """
     Append a timestamped record of user actions to output/audit_log.csv.
     """
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    os.makedirs('output', exist_ok=True)
-    log_file = 'output/audit_log.csv'
-    first_entry = not os.path.exists(log_file) or os.path.getsize(log_file) == 0
-
-    with open(log_file, 'a', newline='') as f:
-        writer = csv.writer(f)
-        if first_entry:
-            writer.writerow(['Timestamp', 'Username', 'Role', 'Action'])
-        writer.writerow([timestamp, username, role, action])
+    append_log_row(
+        'output/audit_log.csv', [username, role, action],
+        header=['Timestamp', 'Username', 'Role', 'Action']
+    )
 
 def validate_date(date_str):
     """
     Validate that date_str follows YYYY-MM-DD format.
     Returns True if valid, False otherwise.
     """
+    # The format is fixed, so check it by position instead of parsing it
+    if len(date_str) != 10 or date_str[4] != '-' or date_str[7] != '-':
+        return False
+    year, month, day = date_str[:4], date_str[5:7], date_str[8:]
+    if not (date_str.isascii() and year.isdigit()
+            and month.isdigit() and day.isdigit()):
+        return False  # int() alone would also take '+1' or ' 1'
     try:
-        datetime.strptime(date_str, '%Y-%m-%d')
+        date(int(year), int(month), int(day))  # Catches 2023-02-30 etc.
         return True
     except ValueError:
         return False
 
-def generate_unique_id():
+# Everyday IDs: a random per-process prefix plus a counter, so making one
+# costs no system call at all
+_ID_PREFIX = os.urandom(6).hex()
+_ID_COUNTER = itertools.count()
+
+# Ready-made UUID4s; random bytes are fetched for a whole batch at once
+_UUID_POOL = []
+_UUID_BATCH = 256
+
+def _reset_ids():
+    """Start a fresh prefix and pool so a forked child can't reuse IDs."""
+    global _ID_PREFIX, _ID_COUNTER
+    _ID_PREFIX = os.urandom(6).hex()
+    _ID_COUNTER = itertools.count()
+    _UUID_POOL.clear()
+
+if hasattr(os, 'register_at_fork'):
+    # A forked child must not hand out the same IDs as its parent
+    os.register_at_fork(after_in_child=_reset_ids)
+
+def generate_unique_id(cryptographic=False):
     """
-    Generate a universally unique identifier (UUID4).
+    Generate a unique ID for a new record.
+    By default this is '<random prefix>-<counter>', unique across processes
+    but predictable. Pass cryptographic=True for an unguessable UUID4.
     """
-    return str(uuid4())
+    if not cryptographic:
+        return f"{_ID_PREFIX}-{next(_ID_COUNTER):x}"
+
+    if not _UUID_POOL:
+        buf = os.urandom(16 * _UUID_BATCH)  # One syscall per batch
+        _UUID_POOL.extend(
+            UUID(bytes=buf[i:i + 16], version=4)  # Sets version/variant bits
+            for i in range(0, len(buf), 16)
+        )
+    return str(_UUID_POOL.pop())